@@ -4,26 +4,31 @@ import csv
 import tkinter as tk
 import urllib.parse
 from tkinter import filedialog, ttk, messagebox, scrolledtext
-from PIL import Image, ImageTk
+from PIL import Image, ImageTk, ImageFile
 import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from pathlib import Path
 import sys
 import json
 import time
+import hashlib
+import mmap
+import operator
 
 # Handle imports with try/except to identify missing dependencies
-try:
-    import pandas as pd
-except ImportError:
-    print("Error: pandas module not installed. Please install it using 'pip install pandas'")
-    sys.exit(1)
-
 try:
     import requests
 except ImportError:
     print("Error: requests module not installed. Please install it using 'pip install requests'")
     sys.exit(1)
 
+# Load partially downloaded images instead of failing on them
+ImageFile.LOAD_TRUNCATED_IMAGES = True
+
+# Resampling filter for the card preview (Image.Resampling on Pillow 9.1+)
+_THUMB_FILTER = getattr(Image, "Resampling", Image).BILINEAR
+
 # Try to import RapidOCR with detailed error handling
 try:
     from rapidocr_onnxruntime import RapidOCR
@@ -33,6 +38,58 @@ except ImportError as e:
     print("OCR functionality will be disabled. Install RapidOCR using 'pip install rapidocr-onnxruntime'")
     HAS_OCR = False
 
+# RapidOCR's ONNX sessions release the GIL during inference, so a shared reader
+# can serve several images concurrently from a small thread pool.
+# Pool threads and ONNX's own intra-op threads compete for the same cores, so
+# only one of them should be above 1: either several images at once with
+# single-threaded inference, or one image at a time using every core.
+MAX_OCR_WORKERS = min(8, os.cpu_count() or 1)
+
+# When images are processed one at a time, a loader thread decodes the next
+# images during OCR. Decoded images in memory are capped at the queue size plus
+# the one being recognized and the one the loader is waiting to enqueue.
+LOAD_QUEUE_SIZE = 4
+_LOAD_DONE = object()
+
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp'})
+
+# OCR output is deterministic, so results are cached by image content hash
+OCR_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".card_scanner_cache.json")
+
+# Per-card fields; card_data keeps one list per field (columnar layout)
+CARD_FIELDS = ('filename', 'title', 'collector_number', 'cleaned_collector', 'expansion',
+               'cleaned_expansion', 'image_path', 'text_lines', 'status')
+
+# CSV export: header names and the card_data columns written under them
+CSV_HEADER = ('filename', 'title', 'collector_number', 'expansion', 'status')
+_export_columns = operator.itemgetter('filename', 'title', 'cleaned_collector', 'cleaned_expansion', 'status')
+# Exports are written on a worker thread through a 1 MB buffer
+CSV_WRITE_BUFFER = 1 << 20
+
+# Results from worker threads are buffered and pushed to the UI in batches
+UI_FLUSH_INTERVAL_MS = 100
+
+# Treeview inserts slow down as the tree grows, so only this many rows are
+# shown at once; the rest stay in card_data and are reachable through the filter
+MAX_VISIBLE_ROWS = 500
+
+# Card text patterns, compiled once and reused for every OCR line
+# Set code directly before the "EN" language marker, in priority order.
+# With a separator ("DMU.EN", "M21 • EN", or the bullet misread as "-", "*", "»"...)
+# the three characters before it are taken, so OCR noise glued to the front
+# ("XDMU.EN") is dropped. Without one ("DMUEN", "DMU EN") the code must be a whole
+# word, which keeps words like "LEGENDARY" from matching. Codes may contain
+# digits but need a letter.
+_RE_SEPARATED_EN = re.compile(r'(?=[A-Z0-9]{0,2}[A-Z])([A-Z0-9]{3})\s*[^\w\s]{1,2}\s*EN\b')
+_RE_BARE_EN = re.compile(r'\b(?=[A-Z0-9]*[A-Z])([A-Z0-9]{2,5})\s*EN\b')
+_RE_UPPER3 = re.compile(r'\b[A-Z]{3,}\b')
+_RE_INC_SLASH = re.compile(r'(\d+/\d+[CUMLR]?)')
+_RE_RARITY_START = re.compile(r'^([CLUMR])(\d{4})')
+_RE_RARITY_SLASH = re.compile(r'(\d+)/(\d+)([CUMLR])')
+_RE_SLASH = re.compile(r'(\d+)/(\d+)')
+_RE_STANDALONE = re.compile(r'\b\d+\b')
+_RE_NON_DIGIT = re.compile(r'\D')
+
 class CardScannerApp:
     def __init__(self, root):
         self.root = root
@@ -42,29 +99,57 @@ class CardScannerApp:
         
         # Initialize OCR if available
         self.ocr = None
-        if HAS_OCR:
-            try:
-                self.ocr = RapidOCR()
-                print("RapidOCR initialized successfully")
-            except Exception as e:
-                print(f"Error initializing RapidOCR: {str(e)}")
-                messagebox.showwarning("OCR Warning", 
-                    "Could not initialize RapidOCR. OCR functionality will be disabled.\n"
-                    f"Error: {str(e)}")
+        self.parallel_images = tk.BooleanVar(value=True)
+        self.init_ocr()
         
         # Variables
         self.input_folder = tk.StringVar()
         self.output_csv = tk.StringVar(value="card_data.csv")
         self.current_image_path = None
-        self.card_data = []
+        self.reset_card_data()
         self.processed_count = 0
         self.total_images = 0
         self.processing_active = False
         self.tk_image = None  # Keep reference to prevent garbage collection
+        self._exporting = False  # A CSV export is being written in the background
+        self.last_processed_name = ""
+        
+        # Results waiting to be added to the tree by _flush_pending
+        self._pending_items = []
+        self._pending_lock = threading.Lock()
+        self._flush_scheduled = False
+        
+        # Results tree window: rows shown, matching rows left out, active filter
+        self._visible_rows = 0
+        self._hidden_rows = 0
+        self._filter_text = ""
+        
+        # OCR cache: content hash -> recognized text lines
+        self._ocr_cache = self.load_ocr_cache()
+        self._ocr_cache_lock = threading.Lock()
+        self._ocr_cache_dirty = False
+        # Serializes cache file writes so concurrent saves can't interleave
+        self._ocr_cache_save_lock = threading.Lock()
         
         # Create UI elements
         self.create_widgets()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
+    def init_ocr(self):
+        """Create the RapidOCR reader with ONNX threading matched to the processing mode"""
+        if not HAS_OCR:
+            return
+        intra_op_threads = 1 if self.parallel_images.get() else (os.cpu_count() or 1)
+        try:
+            self.ocr = RapidOCR(intra_op_num_threads=intra_op_threads)
+            print(f"RapidOCR initialized successfully ({intra_op_threads} inference thread(s))")
+        except Exception as e:
+            self.ocr = None
+            print(f"Error initializing RapidOCR: {str(e)}")
+            messagebox.showwarning("OCR Warning", 
+                "Could not initialize RapidOCR. OCR functionality will be disabled.\n"
+                f"Error: {str(e)}")
+
     def create_widgets(self):
         # Main frame
         main_frame = ttk.Frame(self.root, padding=10)
@@ -109,6 +194,14 @@ class CardScannerApp:
         )
         self.export_btn.pack(side=tk.LEFT, padx=5)
         
+        self.parallel_check = ttk.Checkbutton(
+            button_frame,
+            text="Parallel images",
+            variable=self.parallel_images,
+            command=self.init_ocr
+        )
+        self.parallel_check.pack(side=tk.LEFT, padx=5)
+        
         # Progress indicator
         progress_frame = ttk.Frame(main_frame)
         progress_frame.pack(fill=tk.X, pady=5)
@@ -143,6 +236,15 @@ class CardScannerApp:
         table_frame = ttk.LabelFrame(results_pane, text="Extracted Card Data")
         results_pane.add(table_frame, weight=2)
         
+        filter_frame = ttk.Frame(table_frame)
+        filter_frame.pack(side=tk.TOP, fill=tk.X, padx=5, pady=2)
+        ttk.Label(filter_frame, text="Filter:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", self.apply_filter)
+        ttk.Entry(filter_frame, textvariable=self.filter_var, width=30).pack(side=tk.LEFT, padx=5)
+        self.hidden_rows_label = ttk.Label(filter_frame, text="")
+        self.hidden_rows_label.pack(side=tk.LEFT, padx=5)
+        
         # Create treeview for results
         columns = ("filename", "title", "collector_number", "expansion", "status")
         self.results_tree = ttk.Treeview(table_frame, columns=columns, show="headings", selectmode="browse")
@@ -212,10 +314,7 @@ class CardScannerApp:
             return expansion_code
         
         # Remove dots and limit to 3 characters
-        cleaned = expansion_code.replace('.', '')
-        if len(cleaned) > 3:
-            cleaned = cleaned[:3]
-        return cleaned
+        return expansion_code.replace('.', '')[:3]
 
     def clean_collector_number(self, collector_number):
         """Clean collector number by taking first part before slash"""
@@ -223,16 +322,108 @@ class CardScannerApp:
             return collector_number
         
         # Take first part if slash exists
-        if '/' in collector_number:
-            collector_number = collector_number.split('/')[0]
-        
-        # Further clean non-digit characters if it makes sense
-        if re.search(r'\d', collector_number):  # Only clean if it contains digits
-            cleaned_number = re.sub(r'\D', '', collector_number)
-            if cleaned_number:  # Only use cleaned version if not empty
-                collector_number = cleaned_number
+        collector_number = collector_number.partition('/')[0]
         
-        return collector_number
+        # Strip non-digit characters, keeping the value as is if it has no digits
+        return _RE_NON_DIGIT.sub('', collector_number) or collector_number
+
+    def load_ocr_cache(self):
+        """Load cached OCR results from disk, starting empty if unavailable"""
+        try:
+            with open(OCR_CACHE_FILE, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if isinstance(cache, dict):
+                return cache
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Could not load OCR cache: {str(e)}")
+        return {}
+
+    def save_ocr_cache(self):
+        """Write the OCR cache to disk if it changed since the last save
+        
+        The cache is written to a temporary file and moved into place, so an
+        interrupted save never leaves a truncated cache behind.
+        """
+        with self._ocr_cache_save_lock:
+            with self._ocr_cache_lock:
+                if not self._ocr_cache_dirty:
+                    return
+                snapshot = dict(self._ocr_cache)
+                self._ocr_cache_dirty = False
+            tmp_path = f"{OCR_CACHE_FILE}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f)
+                os.replace(tmp_path, OCR_CACHE_FILE)
+            except Exception as e:
+                print(f"Could not save OCR cache: {str(e)}")
+                with self._ocr_cache_lock:
+                    self._ocr_cache_dirty = True
+
+    def image_cache_key(self, image_path):
+        """Hash the image file through a read-only memory map instead of reading it into memory"""
+        with open(image_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # Empty files cannot be memory-mapped
+                return hashlib.blake2b(b'', digest_size=16).hexdigest()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return hashlib.blake2b(mm, digest_size=16).hexdigest()
+
+    def prepare_image(self, image_path):
+        """Hash an image and, unless its OCR result is cached, decode it for RapidOCR
+        
+        The decoded PIL image is passed on as is, so RapidOCR applies the same
+        colour conversion and alpha handling as when it opens the path itself.
+        """
+        key = self.image_cache_key(image_path)
+        with self._ocr_cache_lock:
+            if key in self._ocr_cache:
+                return key, None
+        img = Image.open(image_path)
+        img.load()
+        return key, img
+
+    def run_ocr(self, image_path, cache_key=None, image=None):
+        """Return OCR text lines for an image, reusing cached results when possible
+        
+        cache_key and image may be supplied by prepare_image; otherwise the file
+        is hashed here and RapidOCR reads it from disk.
+        """
+        key = cache_key or self.image_cache_key(image_path)
+        with self._ocr_cache_lock:
+            lines = self._ocr_cache.get(key)
+        if lines is not None:
+            return lines
+        
+        result, elapse = self.ocr(image if image is not None else image_path)
+        lines = [line[1] for line in result] if result else []
+        with self._ocr_cache_lock:
+            self._ocr_cache[key] = lines
+            self._ocr_cache_dirty = True
+        return lines
+
+    def on_close(self):
+        self.processing_active = False
+        self.save_ocr_cache()
+        self.root.destroy()
+
+    def reset_card_data(self):
+        """Start an empty columnar card store and its image path -> row index map"""
+        self.card_data = {field: [] for field in CARD_FIELDS}
+        self._path_index = {}
+
+    def append_card(self, item):
+        """Append one card record (a dict keyed by CARD_FIELDS) as a new row"""
+        for field in CARD_FIELDS:
+            self.card_data[field].append(item[field])
+        row = len(self.card_data['filename']) - 1
+        self._path_index[item['image_path']] = row
+        return row
+
+    def card_count(self):
+        return len(self.card_data['filename'])
 
     def browse_input_folder(self):
         folder = filedialog.askdirectory(title="Select Input Folder")
@@ -260,22 +451,30 @@ class CardScannerApp:
         self.process_btn.config(state=tk.DISABLED)
         self.stop_btn.config(state=tk.NORMAL)
         self.export_btn.config(state=tk.DISABLED)
+        self.parallel_check.config(state=tk.DISABLED)
         threading.Thread(target=self.process_images, daemon=True).start()
 
     def stop_processing(self):
         self.processing_active = False
+        # Save off the UI thread; the processing thread saves again once in-flight OCR finishes
+        threading.Thread(target=self.save_ocr_cache, daemon=True).start()
         self.status_var.set("Processing stopped by user")
         self.process_btn.config(state=tk.NORMAL)
         self.stop_btn.config(state=tk.DISABLED)
-        if self.card_data:
+        self.parallel_check.config(state=tk.NORMAL)
+        if self.card_count():
             self.export_btn.config(state=tk.NORMAL)
 
     def clear_results(self):
-        for item in self.results_tree.get_children():
-            self.results_tree.delete(item)
+        self.results_tree.delete(*self.results_tree.get_children())
+        self._visible_rows = 0
+        self._hidden_rows = 0
+        self.update_hidden_rows_label()
         self.text_display.delete(1.0, tk.END)
         self.log.delete(1.0, tk.END)
-        self.card_data = []
+        self.reset_card_data()
+        with self._pending_lock:
+            self._pending_items = []
         self.processed_count = 0
         self.progress_bar["value"] = 0
         self.progress_label.config(text="0/0 images processed")
@@ -285,46 +484,115 @@ class CardScannerApp:
     def process_images(self):
         try:
             input_folder = self.input_folder.get()
-            extensions = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp')
-            files = [f for f in os.listdir(input_folder)
-                    if os.path.isfile(os.path.join(input_folder, f)) and f.lower().endswith(extensions)]
+            # scandir entries carry file type info from the directory listing,
+            # avoiding a stat call per file
+            with os.scandir(input_folder) as entries:
+                files = [e.name for e in entries
+                         if e.is_file() and os.path.splitext(e.name)[1].lower() in IMAGE_EXTENSIONS]
             
             if not files:
                 self.update_status("No image files found in the selected folder.")
                 self.process_btn.config(state=tk.NORMAL)
                 self.stop_btn.config(state=tk.DISABLED)
+                self.parallel_check.config(state=tk.NORMAL)
                 return
                 
             self.total_images = len(files)
             self.update_status(f"Found {self.total_images} images to process")
             
-            for i, fname in enumerate(files):
-                if not self.processing_active:
-                    break
-                path = os.path.join(input_folder, fname)
-                self.update_status(f"Processing {i+1}/{self.total_images}: {fname}")
-                self.processed_count = i+1
-                self.update_progress()
-                self.process_single_image(path)
+            paths = [os.path.join(input_folder, fname) for fname in files]
+            if self.parallel_images.get():
+                # Each pool thread hashes and decodes its own image inside run_ocr
+                workers = MAX_OCR_WORKERS
+                loaded = None
+                entries = ((path, None, None) for path in paths)
+            else:
+                # Decoding and OCR are both native calls that release the GIL, so the
+                # loader thread decodes the next images while the single worker runs OCR
+                workers = 1
+                loaded = queue.Queue(maxsize=LOAD_QUEUE_SIZE)
+                threading.Thread(target=self._load_images, args=(paths, loaded), daemon=True).start()
+                entries = iter(loaded.get, _LOAD_DONE)
+            
+            stopped_early = False
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                pending = {}
+                for entry in entries:
+                    if not self.processing_active:
+                        stopped_early = True
+                        break
+                    pending[executor.submit(self._ocr_one, *entry)] = entry[0]
+                    # Keep one job per worker in flight so queued jobs stay bounded
+                    if len(pending) >= workers:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            self._record_result(pending.pop(future), future.result())
+                
+                for future in as_completed(list(pending)):
+                    if not self.processing_active:
+                        break
+                    self._record_result(pending.pop(future), future.result())
+                for future in pending:
+                    future.cancel()
+            
+            # If stopped early, drain the queue so the loader can finish
+            if loaded is not None and stopped_early:
+                for _ in iter(loaded.get, _LOAD_DONE):
+                    pass
                 
+            self.save_ocr_cache()
             if self.processing_active:
-                self.update_status(f"Processing complete. {self.processed_count} images processed.")
                 self.processing_active = False
+                self.update_status(f"Processing complete. {self.processed_count} images processed.")
                 
-            self.root.after(0, lambda: self.process_btn.config(state=tk.NORMAL))
-            self.root.after(0, lambda: self.stop_btn.config(state=tk.DISABLED))
-            
-            if self.card_data:
-                self.root.after(0, lambda: self.export_btn.config(state=tk.NORMAL))
+            self.root.after(0, self._finish_processing)
                 
         except Exception as e:
             error_msg = f"Error during processing: {str(e)}"
             print(error_msg)
             self.update_status(error_msg)
-            self.root.after(0, lambda: self.process_btn.config(state=tk.NORMAL))
-            self.root.after(0, lambda: self.stop_btn.config(state=tk.DISABLED))
+            self.root.after(0, self._finish_processing)
+
+    def _finish_processing(self):
+        """Restore the buttons once the processing thread is done"""
+        self.stop_btn.config(state=tk.DISABLED)
+        self.parallel_check.config(state=tk.NORMAL)
+        # After Stop, an export may have started while in-flight OCR finished;
+        # _finish_export re-enables Process and Export when it is done
+        if self._exporting:
+            return
+        self.process_btn.config(state=tk.NORMAL)
+        if self.card_count():
+            self.export_btn.config(state=tk.NORMAL)
+
+    def _load_images(self, paths, loaded):
+        """Loader thread: hash and decode images ahead of OCR into the bounded queue"""
+        try:
+            for path in paths:
+                if not self.processing_active:
+                    break
+                key, image = None, None
+                if HAS_OCR and self.ocr is not None:
+                    try:
+                        key, image = self.prepare_image(path)
+                    except Exception as e:
+                        # Leave it to _ocr_one, which reports errors per image
+                        print(f"Could not pre-load {path}: {str(e)}")
+                loaded.put((path, key, image))
+        finally:
+            loaded.put(_LOAD_DONE)
+
+    def _record_result(self, image_path, item):
+        """Store a finished item and queue it for display"""
+        self.last_processed_name = os.path.basename(image_path)
+        self.processed_count += 1
+        if item is None:
+            self.schedule_flush()
+            return
+        self.add_to_results(item)
 
-    def process_single_image(self, image_path):
+    def _ocr_one(self, image_path, cache_key=None, image=None):
+        """Run OCR and parsing for one image; safe to call from worker threads"""
         try:
             filename = os.path.basename(image_path)
             lines = []
@@ -332,11 +600,9 @@ class CardScannerApp:
             # Attempt OCR if available
             if HAS_OCR and self.ocr is not None:
                 try:
-                    result, elapse = self.ocr(image_path)
-                    if result:
-                        lines = [line[1] for line in result]
-                        full_text = " ".join(lines)
-                        title, collector, expansion = self.parse_card_data(lines, full_text)
+                    lines = self.run_ocr(image_path, cache_key, image)
+                    if lines:
+                        title, collector, expansion = self.parse_card_data(lines)
                     else:
                         title, collector, expansion = "No text detected", "Unknown", "Unknown"
                 except Exception as ocr_error:
@@ -354,7 +620,7 @@ class CardScannerApp:
             cleaned_expansion = self.clean_expansion_code(expansion)
             cleaned_collector = self.clean_collector_number(collector)
             
-            item = {
+            return {
                 'filename': filename, 
                 'title': title, 
                 'collector_number': collector,  # Store original value
@@ -365,122 +631,170 @@ class CardScannerApp:
                 'text_lines': lines, 
                 'status': "Processed"
             }
-                
-            self.card_data.append(item)
-            self.add_to_results(item)
-            
-            # Display first image automatically
-            if len(self.card_data) == 1:
-                self.display_image(item['image_path'])
-                self.update_text_display(item['text_lines'])
-                
-            return True
         except Exception as e:
             print(f"Error processing {image_path}: {e}")
-            return False
+            return None
 
-    def parse_card_data(self, text_lines, full_text):
+    def parse_card_data(self, text_lines):
         title = "Unknown"
         collector_number = "Unknown"
         expansion = "Unknown"
         
         # Skip processing if empty
-        if not text_lines or "Empty" in full_text:
+        if not text_lines or any("Empty" in line for line in text_lines):
             return title, collector_number, expansion
         
         # Extract title (first non-empty line)
-        for line in text_lines:
-            if line.strip():
-                title = line.strip()
-                break
-        
-        # 1. Look for ".EN" pattern for expansion extraction
-        for line in text_lines:
-            dot_en_match = re.search(r'([A-Z]{3})\.EN', line)
-            if dot_en_match:
-                # Take the three characters before the dot as expansion
-                expansion = dot_en_match.group(1)
-                break
-                
-        # 2. Look for "EN" pattern for expansion 
-        if expansion == "Unknown":
-            for line in text_lines:
-                # Find EN in the line
-                if "EN" in line:
-                    # Take all characters from beginning of line up to "EN"
-                    en_index = line.find("EN")
-                    if en_index > 0:  # Make sure there are characters before "EN"
-                        expansion = line[:en_index].strip()
-                        break
-                
-        # 3. Fallback for expansion - look for uppercase sequence
-        if expansion == "Unknown":
-            exp_match = re.search(r'\b[A-Z]{3,}\b', full_text)
-            if exp_match:
-                expansion = exp_match.group(0)
+        title = next((line.strip() for line in text_lines if line.strip()), title)
         
-        # 1. Look for "Inc." pattern followed by slash for collector number
-        inc_found = False
+        # 1. Look for "Inc." pattern followed by slash for collector number.
+        # This rule needs to look ahead, so it runs before the combined scan.
         for i, line in enumerate(text_lines):
             if "Inc." in line and i < len(text_lines) - 1:
-                inc_found = True
                 # Check the next lines after "Inc."
                 for j in range(i+1, min(i+3, len(text_lines))):
-                    slash_match = re.search(r'(\d+/\d+[CUMLR]?)', text_lines[j])
+                    slash_match = _RE_INC_SLASH.search(text_lines[j])
                     if slash_match:
                         collector_number = slash_match.group(1)
                         break
                 if collector_number != "Unknown":
                     break
         
-        # 2. Look for rarity letters at beginning of line followed by 4 numbers
-        if collector_number == "Unknown":
-            for line in text_lines:
-                # Match lines that start with C, L, U, M, or R followed by 4 digits
-                rarity_start_match = re.match(r'^([CLUMR])(\d{4})', line.strip())
+        # Remaining rules run in a single pass over the lines. Each field keeps
+        # the rank of the rule that set it (lower is better), so a later line can
+        # only override it through a higher priority rule - the same result as
+        # trying each rule over all lines in turn.
+        expansion_rank = 2
+        collector_rank = 0 if collector_number != "Unknown" else 5
+        for line in text_lines:
+            # Expansion 1. Set code separated from "EN" ("DMU.EN", "DMU • EN")
+            if expansion_rank > 0:
+                en_match = _RE_SEPARATED_EN.search(line)
+                if en_match:
+                    expansion, expansion_rank = en_match.group(1), 0
+            
+            # Expansion 2. Set code directly followed by "EN" ("DMUEN", "DMU EN")
+            if expansion_rank > 1:
+                en_match = _RE_BARE_EN.search(line)
+                if en_match:
+                    expansion, expansion_rank = en_match.group(1), 1
+            
+            # Collector 2. Rarity letter (C, L, U, M, R) at line start followed by 4 digits
+            if collector_rank > 1:
+                rarity_start_match = _RE_RARITY_START.match(line.strip())
                 if rarity_start_match:
                     # Capture the 4 digits after the rarity letter
-                    collector_number = rarity_start_match.group(2)
-                    break
-                    
-        # 3. Look for collector number with rarity indication and slash
-        if collector_number == "Unknown":
-            rarity_slash_pattern = r'(\d+)/(\d+)([CUMLR])'
-            for line in text_lines:
-                rarity_match = re.search(rarity_slash_pattern, line)
+                    collector_number, collector_rank = rarity_start_match.group(2), 1
+            
+            # Collector 3. Collector number with rarity indication and slash
+            if collector_rank > 2:
+                rarity_match = _RE_RARITY_SLASH.search(line)
                 if rarity_match:
                     collector_number = f"{rarity_match.group(1)}/{rarity_match.group(2)}{rarity_match.group(3)}"
-                    break
-        
-        # 4. Look for regular slash pattern
-        if collector_number == "Unknown":
-            slash_pattern = r'(\d+)/(\d+)'
-            for line in text_lines:
-                slash_match = re.search(slash_pattern, line)
+                    collector_rank = 2
+            
+            # Collector 4. Regular slash pattern
+            if collector_rank > 3:
+                slash_match = _RE_SLASH.search(line)
                 if slash_match:
-                    collector_number = f"{slash_match.group(1)}/{slash_match.group(2)}"
-                    break
+                    collector_number, collector_rank = f"{slash_match.group(1)}/{slash_match.group(2)}", 3
+            
+            # Collector 5. Standalone numbers
+            if collector_rank > 4:
+                # Use the first sequence of digits that stands alone
+                standalone_match = _RE_STANDALONE.search(line)
+                if standalone_match:
+                    collector_number, collector_rank = standalone_match.group(0), 4
+            
+            # Stop once neither field can be improved by a later line
+            if expansion_rank == 0 and collector_rank <= 1:
+                break
         
-        # 5. Look for standalone numbers
-        if collector_number == "Unknown":
-            for line in text_lines:
-                # Look for digits that are not part of other patterns
-                standalone_digits = re.findall(r'\b\d+\b', line)
-                if standalone_digits:
-                    # Use the first sequence of digits that stands alone
-                    collector_number = standalone_digits[0]
-                    break
+        # Expansion 2. Fallback - look for uppercase sequence across all the text
+        if expansion == "Unknown":
+            full_text = " ".join(text_lines)
+            exp_match = _RE_UPPER3.search(full_text)
+            if exp_match:
+                expansion = exp_match.group(0)
         
         return title, collector_number, expansion
 
     def add_to_results(self, item):
-        """Add item to results tree with cleaned values for display"""
-        self.root.after(0, lambda: self.results_tree.insert(
-            "", tk.END,
-            values=(item['filename'], item['title'], item['cleaned_collector'], 
-                   item['cleaned_expansion'], item['status']),
-            tags=(item['image_path'],)
-        ))
+        """Store item and queue its UI update; updates are applied in batches by _flush_pending"""
+        # Storing and queueing under one lock keeps card_data and the queue
+        # consistent for apply_filter
+        with self._pending_lock:
+            row = self.append_card(item)
+            # Display first image automatically
+            self._pending_items.append((item, row == 0))
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        """Arrange for one _flush_pending call unless one is already scheduled"""
+        with self._pending_lock:
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self.root.after(UI_FLUSH_INTERVAL_MS, self._flush_pending)
+
+    def _flush_pending(self):
+        """Apply all queued UI updates and refresh progress in one pass"""
+        with self._pending_lock:
+            ui_updates, self._pending_items = self._pending_items, []
+            self._flush_scheduled = False
+        for ui_update in ui_updates:
+            self._apply_ui_update(ui_update)
+        self.update_hidden_rows_label()
+        self.update_progress()
+        if self.processing_active:
+            self.status_var.set(f"Processing {self.processed_count}/{self.total_images}: {self.last_processed_name}")
+
+    def _apply_ui_update(self, ui_update):
+        """Show one finished image: its results row and, for the first image, its preview"""
+        item, display_first = ui_update
+        values = (item['filename'], item['title'], item['cleaned_collector'], 
+                  item['cleaned_expansion'], item['status'])
+        if self.matches_filter(values):
+            self.show_row(values, item['image_path'])
+        if display_first:
+            self.display_image(item['image_path'])
+            self.update_text_display(item['text_lines'])
+
+    def matches_filter(self, values):
+        return not self._filter_text or any(self._filter_text in str(v).lower() for v in values)
+
+    def show_row(self, values, image_path):
+        """Insert a row into the results tree unless the visible window is full"""
+        if self._visible_rows >= MAX_VISIBLE_ROWS:
+            self._hidden_rows += 1
+            return
+        self.results_tree.insert("", tk.END, values=values, tags=(image_path,))
+        self._visible_rows += 1
+
+    def update_hidden_rows_label(self):
+        self.hidden_rows_label.config(text=f"+{self._hidden_rows} more rows" if self._hidden_rows else "")
+
+    def apply_filter(self, *args):
+        """Repopulate the results tree with the cards matching the filter text"""
+        self._filter_text = self.filter_var.get().strip().lower()
+        self.results_tree.delete(*self.results_tree.get_children())
+        self._visible_rows = 0
+        self._hidden_rows = 0
+        # Queued items are already in card_data, so their rows are shown from there
+        with self._pending_lock:
+            ui_updates, self._pending_items = self._pending_items, []
+            count = self.card_count()
+        for item, display_first in ui_updates:
+            if display_first:
+                self.display_image(item['image_path'])
+                self.update_text_display(item['text_lines'])
+        cards = self.card_data
+        rows = zip(cards['filename'][:count], cards['title'][:count], cards['cleaned_collector'][:count],
+                   cards['cleaned_expansion'][:count], cards['status'][:count], cards['image_path'][:count])
+        for *values, image_path in rows:
+            if self.matches_filter(values):
+                self.show_row(tuple(values), image_path)
+        self.update_hidden_rows_label()
 
     def on_result_select(self, event):
         sel = self.results_tree.selection()
@@ -490,23 +804,22 @@ class CardScannerApp:
         path = self.results_tree.item(item, 'tags')[0]
         self.current_image_path = path
         self.display_image(path)
-        for card in self.card_data:
-            if card['image_path'] == path:
-                self.update_text_display(card['text_lines'])
-                self.title_var.set(vals[1])
-                self.collector_var.set(vals[2])  # This now uses the cleaned collector number
-                self.expansion_var.set(vals[3])  # This now uses the cleaned expansion code
-                self.update_btn.config(state=tk.NORMAL)
-                break
+        row = self._path_index.get(path)
+        if row is not None:
+            self.update_text_display(self.card_data['text_lines'][row])
+            self.title_var.set(vals[1])
+            self.collector_var.set(vals[2])  # This now uses the cleaned collector number
+            self.expansion_var.set(vals[3])  # This now uses the cleaned expansion code
+            self.update_btn.config(state=tk.NORMAL)
 
     def display_image(self, image_path):
         try:
             img = Image.open(image_path)
             max_w, max_h = 350, 500
-            w, h = img.size
-            if w > max_w or h > max_h:
-                r = min(max_w/w, max_h/h)
-                img = img.resize((int(w*r), int(h*r)), Image.LANCZOS)
+            # Let libjpeg decode at a reduced scale (no-op for other formats),
+            # then shrink in place keeping the aspect ratio
+            img.draft('RGB', (max_w*2, max_h*2))
+            img.thumbnail((max_w, max_h), _THUMB_FILTER)
             self.tk_image = ImageTk.PhotoImage(img)
             self.image_label.config(image=self.tk_image)
         except Exception as e:
@@ -539,61 +852,85 @@ class CardScannerApp:
         new_vals = (fv[0], new_title, cleaned_collector, cleaned_expansion, "Updated")
         self.results_tree.item(item, values=new_vals)
         
-        for card in self.card_data:
-            if card['image_path'] == self.current_image_path:
-                # Update both original and cleaned values
-                card['title'] = new_title
-                card['collector_number'] = new_collector
-                card['cleaned_collector'] = cleaned_collector
-                card['expansion'] = new_expansion
-                card['cleaned_expansion'] = cleaned_expansion
-                card['status'] = "Updated"
-                break
+        row = self._path_index.get(self.current_image_path)
+        if row is not None:
+            # Update both original and cleaned values
+            self.card_data['title'][row] = new_title
+            self.card_data['collector_number'][row] = new_collector
+            self.card_data['cleaned_collector'][row] = cleaned_collector
+            self.card_data['expansion'][row] = new_expansion
+            self.card_data['cleaned_expansion'][row] = cleaned_expansion
+            self.card_data['status'][row] = "Updated"
                 
         self.status_var.set(f"Updated card data for {fv[0]}")
         self.log_message(f"Updated card: {fv[0]}, Title: {new_title}, Collector: {cleaned_collector}, Set: {cleaned_expansion}")
 
     def export_to_csv(self):
-        if not self.card_data:
+        if not self.card_count():
             messagebox.showinfo("Export", "No data to export")
             return
         output = self.output_csv.get()
         if not output:
             return
+        # Rows are snapshotted here so edits made during the write don't race it.
+        # Use cleaned values for CSV export; rows are built once, in C, from the columns
+        rows = list(zip(*_export_columns(self.card_data)))
+        # No new run may start while the rows are being written
+        self._exporting = True
+        self.export_btn.config(state=tk.DISABLED)
+        self.process_btn.config(state=tk.DISABLED)
+        self.status_var.set(f"Exporting {len(rows)} cards to {output}...")
+        threading.Thread(target=self._do_export, args=(output, rows), daemon=True).start()
+
+    def _do_export(self, output, rows):
+        """Write the CSV on a worker thread and report back to the UI thread"""
         try:
-            # Use cleaned values for CSV export
-            df = pd.DataFrame([{
-                'filename': c['filename'], 
-                'title': c['title'],
-                'collector_number': c['cleaned_collector'],  # Use cleaned value
-                'expansion': c['cleaned_expansion'],  # Use cleaned value
-                'status': c['status']
-            } for c in self.card_data])
-            df.to_csv(output, index=False)
-            self.status_var.set(f"Data exported successfully to {output}")
-            self.log_message(f"Exported {len(self.card_data)} cards to {output}")
-            messagebox.showinfo("Export Complete", f"Card data has been exported to {output}")
+            with open(output, 'w', newline='', encoding='utf-8', buffering=CSV_WRITE_BUFFER) as f:
+                writer = csv.writer(f)
+                writer.writerow(CSV_HEADER)
+                writer.writerows(rows)
         except Exception as e:
-            error_msg = f"Error exporting data: {str(e)}"
-            print(error_msg)
-            self.status_var.set(error_msg)
-            self.log_message(f"Export error: {str(e)}")
-            messagebox.showerror("Export Error", error_msg)
+            self.root.after(0, self._export_failed, e)
+        else:
+            self.root.after(0, self._export_done, output, len(rows))
+
+    def _finish_export(self):
+        """Re-enable the buttons disabled for an export, unless a run is in progress"""
+        self._exporting = False
+        if not self.processing_active:
+            self.process_btn.config(state=tk.NORMAL)
+            self.export_btn.config(state=tk.NORMAL)
+
+    def _export_done(self, output, count):
+        self._finish_export()
+        self.status_var.set(f"Data exported successfully to {output}")
+        self.log_message(f"Exported {count} cards to {output}")
+        messagebox.showinfo("Export Complete", f"Card data has been exported to {output}")
+
+    def _export_failed(self, error):
+        self._finish_export()
+        error_msg = f"Error exporting data: {str(error)}"
+        print(error_msg)
+        self.status_var.set(error_msg)
+        self.log_message(f"Export error: {str(error)}")
+        messagebox.showerror("Export Error", error_msg)
 
     def log_message(self, message):
         """Add a message to the log"""
         timestamp = time.strftime("%H:%M:%S")
-        self.root.after(0, lambda: self.log.insert(tk.END, f"[{timestamp}] {message}\n"))
-        self.root.after(0, lambda: self.log.see(tk.END))  # Scroll to end
+        self.root.after(0, self._append_log, f"[{timestamp}] {message}\n")
+
+    def _append_log(self, text):
+        self.log.insert(tk.END, text)
+        self.log.see(tk.END)  # Scroll to end
 
     def update_status(self, msg):
         self.root.after(0, lambda: self.status_var.set(msg))
 
     def update_progress(self):
-        self.root.after(0, lambda: (
-            self.progress_bar.config(value=int((self.processed_count/self.total_images)*100) if self.total_images else 0),
-            self.progress_label.config(text=f"{self.processed_count}/{self.total_images} images processed")
-        ))
+        """Refresh the progress bar and label; must run on the UI thread"""
+        self.progress_bar.config(value=int((self.processed_count/self.total_images)*100) if self.total_images else 0)
+        self.progress_label.config(text=f"{self.processed_count}/{self.total_images} images processed")
 
 
 def main():